@@ -2,45 +2,65 @@
 Основная программа для автоматической генерации расчётов на прочность
 """
 import os
-import sys
-from typing import Dict
-
-# Добавляем путь к модулям
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'modules'))
+import hashlib
+import pickle
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Set, Tuple
+import orjson
 
 from modules.config_manager import ConfigManager
 from modules.logger import RPLogger
-from modules.excel_reader import ExcelReader
-from modules.pdf_parser import PDFParser
-from modules.docx_generator import DOCXGenerator
+from modules.excel_reader import ExcelReader, Product
 
 
 class StrengthCalculationGenerator:
     """Главный класс программы генерации расчётов на прочность"""
     
-    def __init__(self, config_path: str, texts_path: str):
+    # Максимальное число документов, ожидающих фонового сохранения
+    MAX_PENDING_SAVES = 4
+    
+    def __init__(self, config_path: str, texts_path: str, log_queue=None):
         """
         Инициализация генератора
         
         Args:
             config_path: путь к config.json
             texts_path: путь к texts_by_category.json
+            log_queue: очередь лога главного процесса (для рабочих процессов)
         """
         # Загрузка конфигурации
         self.config = ConfigManager(config_path, texts_path)
         
         # Инициализация логгера
         log_path = self.config.get_path('log_file')
-        self.logger = RPLogger(log_path)
+        self.logger = RPLogger(log_path, log_queue)
         
         # Инициализация компонентов
         self.excel_reader = None
         self.pdf_parser = None
         self.docx_generator = None
+        
+        # Содержимое папок с изображениями: {папка: множество имён файлов}
+        self._image_dirs: Dict[str, Set[str]] = {}
+        
+        # Документы, сохраняемые в фоне: (изделие, Future с путём к файлу)
+        self._pending_saves = deque()
+        
+        # В рабочих процессах поля через COM не обновляются: пути сохранённых
+        # документов передаются в главный процесс, который обновляет их сам
+        self.defer_field_updates = False
+        self.saved_documents: List[str] = []
     
     def initialize_components(self):
         """Инициализация всех компонентов программы"""
         try:
+            # Парсер PDF и генератор Word тянут тяжёлые библиотеки (PyMuPDF,
+            # python-docx, pywin32), поэтому импортируются только здесь
+            from modules.pdf_parser import PDFParser
+            from modules.docx_generator import DOCXGenerator
+            
             # Excel Reader
             excel_path = self.config.get_path('excel')
             column_mapping = self.config.get_excel_columns()
@@ -63,72 +83,237 @@ class StrengthCalculationGenerator:
             self.logger.log_error('INIT', 'Система', 'ERR_INIT', str(e))
             return False
     
-    def process_product(self, product: Dict) -> bool:
+    def validate_product(self, product: Product) -> Optional[str]:
+        """
+        Проверка наличия картинки и паспорта изделия
+        
+        Args:
+            product: данные изделия из Excel
+            
+        Returns:
+            Путь к паспорту или None (ошибка записана в лог)
+        """
+        article = product.article
+        name = product.name
+        image_path = product.image_path
+        
+        # 1. Проверка наличия картинки
+        if not image_path or not self._image_exists(image_path):
+            self.logger.log_error(
+                article, name, 'ERR_NO_IMAGE',
+                f"Файл изображения не найден: {image_path}",
+                image_path
+            )
+            return None
+        
+        # 2. Поиск паспорта
+        passport_path = self.pdf_parser.find_passport(article)
+        if not passport_path:
+            self.logger.log_error(
+                article, name, 'ERR_NO_PASSPORT',
+                f"Паспорт не найден для артикула {article}"
+            )
+            return None
+        
+        return passport_path
+    
+    def process_product(self, product: Product, passport_path: Optional[str] = None) -> bool:
         """
         Обработка одного изделия
         
         Args:
             product: данные изделия из Excel
+            passport_path: путь к паспорту, если изделие уже проверено validate_product
             
         Returns:
             True если успешно, False если ошибка
         """
-        article = product['article']
-        name = product['name']
-        image_path = product['image_path']
+        article = product.article
+        name = product.name
+        
+        if passport_path is None:
+            passport_path = self.validate_product(product)
+            if not passport_path:
+                return False
         
+        # Этап, на котором произошла ошибка: (код ошибки, описание)
+        stage = ('ERR_PDF_PARSE', "Ошибка парсинга PDF")
         try:
-            # 1. Проверка наличия картинки
-            if not image_path or not os.path.exists(image_path):
-                self.logger.log_error(
-                    article, name, 'ERR_NO_IMAGE',
-                    f"Файл изображения не найден: {image_path}",
-                    image_path
+            # 1. Извлечение технических данных из паспорта
+            technical_data = self.extract_technical_data(passport_path)
+            if not technical_data:
+                self.logger.log_warning(
+                    f"Не удалось извлечь технические данные из паспорта {article}"
                 )
-                return False
+                technical_data = {}
             
-            # 2. Поиск паспорта
-            passport_path = self.pdf_parser.find_passport(article)
-            if not passport_path:
-                self.logger.log_error(
-                    article, name, 'ERR_NO_PASSPORT',
-                    f"Паспорт не найден для артикула {article}"
-                )
-                return False
+            # 2. Генерация документа (сохранение выполняется в фоне)
+            stage = ('ERR_TEMPLATE', "Ошибка генерации документа")
+            save_future = self.docx_generator.generate_document(product, technical_data)
+        except Exception as e:
+            error_code, description = stage
+            self.logger.log_error(article, name, error_code, f"{description}: {str(e)}")
+            return False
+        
+        self._pending_saves.append((product, save_future))
+        self.complete_saves(wait=False)
+        return True
+    
+    def complete_saves(self, wait: bool = True):
+        """
+        Завершение фонового сохранения документов
+        
+        Для сохранённых документов обновляются поля (или путь запоминается
+        в saved_documents при defer_field_updates) и записывается результат
+        в лог; ошибка сохранения регистрируется как ERR_TEMPLATE.
+        
+        Args:
+            wait: ждать все сохранения; иначе обрабатываются только завершённые
+                  (и самые старые, если очередь превысила MAX_PENDING_SAVES)
+        """
+        while self._pending_saves:
+            product, save_future = self._pending_saves[0]
+            if (not wait and not save_future.done()
+                    and len(self._pending_saves) <= self.MAX_PENDING_SAVES):
+                break
+            self._pending_saves.popleft()
             
-            # 3. Извлечение технических данных из паспорта
             try:
-                technical_data = self.pdf_parser.extract_technical_data(passport_path)
-                if not technical_data:
-                    self.logger.log_warning(
-                        f"Не удалось извлечь технические данные из паспорта {article}"
-                    )
-                    technical_data = {}
+                output_path = save_future.result()
             except Exception as e:
                 self.logger.log_error(
-                    article, name, 'ERR_PDF_PARSE',
-                    f"Ошибка парсинга PDF: {str(e)}"
+                    product.article, product.name, 'ERR_TEMPLATE',
+                    f"Ошибка сохранения документа: {str(e)}"
                 )
-                return False
+                continue
+            
+            if self.defer_field_updates:
+                self.saved_documents.append(output_path)
+            else:
+                self.docx_generator.update_fields(output_path)
+            self.logger.log_success(product.article, product.name, output_path)
+    
+    def _image_exists(self, image_path: str) -> bool:
+        """
+        Проверка наличия файла изображения
+        
+        Каждая папка с изображениями читается один раз, дальнейшие проверки
+        выполняются по множеству имён без обращения к файловой системе.
+        
+        Args:
+            image_path: путь к изображению
             
-            # 4. Генерация документа
+        Returns:
+            True если файл существует
+        """
+        directory, filename = os.path.split(os.path.normcase(os.path.abspath(image_path)))
+        
+        names = self._image_dirs.get(directory)
+        if names is None:
             try:
-                output_path = self.docx_generator.generate_document(product, technical_data)
-                self.logger.log_success(article, name, output_path)
-                return True
-            except Exception as e:
-                self.logger.log_error(
-                    article, name, 'ERR_TEMPLATE',
-                    f"Ошибка генерации документа: {str(e)}"
-                )
-                return False
+                with os.scandir(directory) as entries:
+                    names = {os.path.normcase(entry.name) for entry in entries}
+            except OSError:
+                names = set()
+            self._image_dirs[directory] = names
         
-        except Exception as e:
-            self.logger.log_error(
-                article, name, 'ERR_UNKNOWN',
-                f"Неизвестная ошибка: {str(e)}"
-            )
-            return False
+        return filename in names
+    
+    def extract_technical_data(self, passport_path: str) -> Dict:
+        """
+        Извлечение технических данных паспорта с кэшированием
+        
+        Результат парсинга сохраняется в папку paths.cache_dir под именем,
+        равным хэшу содержимого PDF, поэтому при повторных запусках
+        неизменённые паспорта не разбираются заново.
+        
+        Args:
+            passport_path: путь к PDF паспорту
+            
+        Returns:
+            Словарь {параметр: (значение, единица_измерения)}
+        """
+        cache_dir = self.config.get_path('cache_dir')
+        if not cache_dir:
+            return self.pdf_parser.extract_technical_data(passport_path)
+        
+        cache_path = os.path.join(cache_dir, f"{self._file_digest(passport_path)}.json")
+        
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = orjson.loads(f.read())
+            if cached.get('version') == self.pdf_parser.CACHE_VERSION:
+                return {param: tuple(value) for param, value in cached['data'].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        
+        technical_data = self.pdf_parser.extract_technical_data(passport_path)
+        
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps({'version': self.pdf_parser.CACHE_VERSION, 'data': technical_data}))
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            self.logger.log_warning(f"Не удалось сохранить кэш паспорта {passport_path}: {str(e)}")
+        
+        return technical_data
+    
+    @staticmethod
+    def _file_digest(file_path: str) -> str:
+        """Хэш содержимого файла (BLAKE2b, 128 бит)"""
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def load_products(self) -> List[Product]:
+        """
+        Загрузка списка изделий из Excel с кэшированием
+        
+        Разобранный список сохраняется в paths.cache_dir вместе с временем
+        изменения и размером Excel файла: если файл не менялся, повторный
+        запуск не читает книгу заново.
+        
+        Returns:
+            Список изделий
+        """
+        excel_path = self.config.get_path('excel')
+        cache_dir = self.config.get_path('cache_dir')
+        if not cache_dir or not os.path.exists(excel_path):
+            self.excel_reader.load_data()
+            return self.excel_reader.get_products()
+        
+        stat = os.stat(excel_path)
+        cache_key = (
+            os.path.abspath(excel_path), stat.st_mtime_ns, stat.st_size,
+            sorted(self.config.get_excel_columns().items()), ExcelReader.CACHE_VERSION
+        )
+        cache_path = os.path.join(cache_dir, 'excel_products.pkl')
+        
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_key, products = pickle.load(f)
+            if cached_key == cache_key:
+                return products
+        except Exception:
+            pass
+        
+        self.excel_reader.load_data()
+        products = self.excel_reader.get_products()
+        
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((cache_key, products), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            self.logger.log_warning(f"Не удалось сохранить кэш Excel: {str(e)}")
+        
+        return products
     
     def run(self):
         """Запуск программы"""
@@ -142,8 +327,7 @@ class StrengthCalculationGenerator:
         # Загрузка данных из Excel
         try:
             self.logger.log_info(f"Загрузка данных из Excel: {self.config.get_path('excel')}")
-            self.excel_reader.load_data()
-            products = self.excel_reader.get_products()
+            products = self.load_products()
             self.logger.log_info(f"Загружено изделий из Excel: {len(products)}")
         except Exception as e:
             self.logger.log_error('EXCEL', 'Система', 'ERR_EXCEL_READ', str(e))
@@ -152,20 +336,109 @@ class StrengthCalculationGenerator:
         # Фильтрация по категориям
         allowed_categories = self.config.get_categories()
         if allowed_categories:
-            products = [p for p in products if p['category'] in allowed_categories]
+            products = [p for p in products if p.category in allowed_categories]
             self.logger.log_info(f"После фильтрации по категориям осталось: {len(products)} изделий")
         
+        # Изделия без картинки или паспорта отсеиваются до основной обработки,
+        # чтобы обрабатывать (и распределять по процессам) только реальную работу
+        tasks = []
+        for product in products:
+            passport_path = self.validate_product(product)
+            if passport_path:
+                tasks.append((product, passport_path))
+        if len(tasks) < len(products):
+            self.logger.log_info(f"Пропущено изделий без картинки или паспорта: {len(products) - len(tasks)}")
+        
         # Обработка изделий
         self.logger.log_info("-" * 80)
         self.logger.log_info("НАЧАЛО ОБРАБОТКИ ИЗДЕЛИЙ")
         self.logger.log_info("-" * 80)
         
-        for idx, product in enumerate(products, 1):
-            self.logger.log_info(f"\n[{idx}/{len(products)}] Обработка: {product['article']} - {product['name']}")
-            self.process_product(product)
+        max_workers = min(self.config.get_max_workers(), len(tasks))
+        if max_workers > 1:
+            self.process_parallel(tasks, max_workers)
+        else:
+            total = len(tasks)
+            for idx, (product, passport_path) in enumerate(tasks, 1):
+                self.logger.log_info("\n[%d/%d] Обработка: %s - %s", idx, total, product.article, product.name)
+                self.process_product(product, passport_path)
+            self.complete_saves()
         
         # Итоговая статистика
         self.logger.log_summary()
+    
+    def process_parallel(self, tasks: List[Tuple[Product, str]], max_workers: int):
+        """
+        Параллельная обработка изделий в нескольких процессах
+        
+        Каждый рабочий процесс создаёт собственные компоненты один раз,
+        записи лога передаются в главный процесс через очередь,
+        статистика по изделиям суммируется здесь. Поля документов обновляются
+        через COM в главном процессе по мере готовности документов, поэтому
+        Word запускается один раз, а не в каждом рабочем процессе.
+        
+        Args:
+            tasks: список пар (изделие, путь к паспорту)
+            max_workers: число рабочих процессов
+        """
+        total = len(tasks)
+        log_queue = multiprocessing.Queue()
+        listener = self.logger.start_queue_listener(log_queue)
+        
+        try:
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(self.config.config_path, self.config.texts_path, log_queue)
+            ) as executor:
+                futures = {
+                    executor.submit(_process_in_worker, idx, total, product, passport_path): product
+                    for idx, (product, passport_path) in enumerate(tasks, 1)
+                }
+                
+                for future in as_completed(futures):
+                    product = futures[future]
+                    try:
+                        stats, saved_documents = future.result()
+                        self.logger.merge_stats(stats)
+                        for output_path in saved_documents:
+                            self.docx_generator.update_fields(output_path)
+                    except Exception as e:
+                        self.logger.log_error(
+                            product.article, product.name, 'ERR_UNKNOWN',
+                            f"Ошибка рабочего процесса: {str(e)}"
+                        )
+        finally:
+            listener.stop()
+
+
+# Генератор текущего рабочего процесса (создаётся в _init_worker)
+_worker_generator = None
+
+
+def _init_worker(config_path: str, texts_path: str, log_queue):
+    """Инициализация рабочего процесса: компоненты создаются один раз на процесс"""
+    global _worker_generator
+    _worker_generator = StrengthCalculationGenerator(config_path, texts_path, log_queue)
+    _worker_generator.defer_field_updates = True
+    _worker_generator.initialize_components()
+
+
+def _process_in_worker(idx: int, total: int, product: Product, passport_path: str) -> Tuple[Dict, List[str]]:
+    """
+    Обработка одного изделия в рабочем процессе
+    
+    Returns:
+        Статистика логгера по этому изделию и пути сохранённых документов
+        (поля в них обновляет главный процесс)
+    """
+    generator = _worker_generator
+    generator.logger.reset_stats()
+    generator.saved_documents = []
+    generator.logger.log_info("\n[%d/%d] Обработка: %s - %s", idx, total, product.article, product.name)
+    generator.process_product(product, passport_path)
+    generator.complete_saves()
+    return generator.logger.stats, generator.saved_documents
 
 
 def main():
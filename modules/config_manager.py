@@ -1,9 +1,17 @@
 """
 Модуль управления конфигурацией
 """
-import json
 import os
-from typing import Dict, Any
+from typing import Dict, Any, FrozenSet
+import orjson
+
+
+# Тексты по умолчанию для категорий, отсутствующих в texts_by_category.json
+DEFAULT_CATEGORY_TEXTS = {
+    'general_info': 'Объектом расчета является изделие',
+    'construction_description': 'Конструкция представляет собой изделие',
+    'conclusion': 'По результатам расчета установлено'
+}
 
 
 class ConfigManager:
@@ -21,6 +29,13 @@ class ConfigManager:
         self.texts_path = texts_path
         self.config = self._load_json(config_path)
         self.texts = self._load_json(texts_path)
+        
+        # Часто запрашиваемые разделы конфигурации
+        self._paths = self.config.get('paths', {})
+        self._loads = self.config.get('loads', {})
+        self._excel_columns = self.config.get('excel_columns', {})
+        self._passport_pattern = self.config.get('passport_pattern', '*{ART}*.pdf')
+        self._categories = frozenset(self.config.get('categories', []))
     
     @staticmethod
     def _load_json(file_path: str) -> Dict[str, Any]:
@@ -36,12 +51,12 @@ class ConfigManager:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Файл конфигурации не найден: {file_path}")
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(file_path, 'rb') as f:
+            return orjson.loads(f.read())
     
     def get_path(self, key: str) -> str:
         """Получить путь из конфигурации"""
-        return self.config['paths'].get(key, '')
+        return self._paths.get(key, '')
     
     def get_region(self) -> str:
         """Получить регион расчёта"""
@@ -49,27 +64,27 @@ class ConfigManager:
     
     def get_mass_child(self) -> float:
         """Получить массу одного ребёнка"""
-        return self.config['loads'].get('mass_child', 53.8)
+        return self._loads.get('mass_child', 53.8)
     
     def get_snow_load(self) -> Dict[str, Any]:
         """Получить параметры снеговой нагрузки"""
-        return self.config['loads'].get('snow_load', {})
+        return self._loads.get('snow_load', {})
     
     def get_wind_load(self) -> Dict[str, Any]:
         """Получить параметры ветровой нагрузки"""
-        return self.config['loads'].get('wind_load', {})
+        return self._loads.get('wind_load', {})
     
     def get_passport_pattern(self) -> str:
         """Получить паттерн для поиска паспорта"""
-        return self.config.get('passport_pattern', '*{ART}*.pdf')
+        return self._passport_pattern
     
-    def get_categories(self) -> list:
-        """Получить список категорий изделий"""
-        return self.config.get('categories', [])
+    def get_categories(self) -> FrozenSet[str]:
+        """Получить множество категорий изделий"""
+        return self._categories
     
     def get_excel_columns(self) -> Dict[str, str]:
         """Получить маппинг столбцов Excel"""
-        return self.config.get('excel_columns', {})
+        return self._excel_columns
     
     def get_category_texts(self, category: str) -> Dict[str, str]:
         """
@@ -81,11 +96,15 @@ class ConfigManager:
         Returns:
             Словарь с текстами для категории
         """
-        return self.texts.get(category, {
-            'general_info': 'Объектом расчета является изделие',
-            'construction_description': 'Конструкция представляет собой изделие',
-            'conclusion': 'По результатам расчета установлено'
-        })
+        return self.texts.get(category, DEFAULT_CATEGORY_TEXTS)
+    
+    def get_max_workers(self) -> int:
+        """Получить число параллельных процессов обработки (0 - по числу ядер)"""
+        return self.config.get('max_workers') or os.cpu_count() or 1
+    
+    def update_fields_via_word(self) -> bool:
+        """Обновлять ли поля документов через Word (COM) сразу после генерации"""
+        return self.config.get('update_fields_via_word', True)
     
     def is_debug_mode(self) -> bool:
         """Проверка режима отладки"""
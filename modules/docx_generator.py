@@ -2,10 +2,14 @@
 Модуль для генерации Word документов расчётов на прочность - ФИНАЛЬНАЯ ВЕРСИЯ
 """
 import os
-import shutil
 import re
+import copy
+import atexit
+from io import BytesIO
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Tuple, Optional, List
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Tuple, Optional, List, Pattern
 from docx import Document
 from docx.shared import Inches, Pt
 from docx.enum.text import (
@@ -14,17 +18,89 @@ from docx.enum.text import (
     WD_TAB_LEADER,
 )
 from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.opc.part import XmlPart
+from docx.opc.phys_pkg import PhysPkgWriter
+from docx.opc.pkgwriter import PackageWriter
+from docx.table import Table
 from docx.text.paragraph import Paragraph
-import win32com.client
-from PIL import Image
+from lxml import etree
+from modules.excel_reader import Product
+
+# win32com и Pillow импортируются по месту использования: импорт win32com
+# медленный и возможен только в Windows, а изображения нужны не в каждом запуске
+if TYPE_CHECKING:
+    from PIL import Image
 
 
 class DOCXGenerator:
     """Класс для генерации документов Word"""
 
     XML_NAMESPACES = {
+        'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main',
         'wp': 'http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing',
     }
+
+    # Объекты w:drawing в прогонах параграфа (все и только встроенные изображения)
+    RUN_DRAWINGS_XPATH = etree.XPath('./w:r//w:drawing', namespaces=XML_NAMESPACES)
+    RUN_INLINE_PICTURES_XPATH = etree.XPath('./w:r//w:drawing[.//wp:inline]', namespaces=XML_NAMESPACES)
+    # Параграфы тела документа со встроенными изображениями
+    PICTURE_PARAGRAPHS_XPATH = etree.XPath('./w:p[w:r//w:drawing[.//wp:inline]]', namespaces=XML_NAMESPACES)
+    # Параграфы и таблицы тела документа в порядке следования
+    BODY_BLOCKS_XPATH = etree.XPath('./w:p | ./w:tbl', namespaces=XML_NAMESPACES)
+    # Параграфы ячеек таблицы
+    CELL_PARAGRAPHS_XPATH = etree.XPath('./w:tr/w:tc/w:p', namespaces=XML_NAMESPACES)
+    TABLE_TAG = qn('w:tbl')
+    # Признак поля Word внутри параграфа (строки автоматического содержания)
+    HAS_FIELD_XPATH = etree.XPath('boolean(.//w:fldChar)', namespaces=XML_NAMESPACES)
+    # Элементы прогонов параграфа, из которых python-docx составляет Paragraph.text
+    # (включая гиперссылки); запрос скомпилирован один раз, а не на каждый прогон
+    PARAGRAPH_TEXT_XPATH = etree.XPath(
+        '(./w:r | ./w:hyperlink/w:r)/*[self::w:t or self::w:tab or self::w:br or self::w:cr'
+        ' or self::w:noBreakHyphen or self::w:ptab]',
+        namespaces=XML_NAMESPACES,
+    )
+    # Текстовые узлы элемента (для быстрой проверки текста таблицы без обёрток python-docx)
+    TEXT_NODES_XPATH = etree.XPath('.//w:t/text()', namespaces=XML_NAMESPACES)
+    # Весь текст элемента одной строкой (для проверки шаблона целиком)
+    ELEMENT_TEXT_XPATH = etree.XPath('string(.)')
+
+    TOC_LINE_RE = re.compile(r'^(?P<num>\d+)\s*[\.\)]?\s*(?P<title>.+?)\s*(?:\.+|\s)+(?P<page>\d+)$')
+    FORMULA_RE = re.compile(r'^[A-Za-zА-Яа-я0-9\s\(\)\+\-\*=\/.,≥≤≈]+$')
+    INVALID_FILENAME_CHARS = str.maketrans({char: '_' for char in '<>:"/\\|?*'})
+    ARTICLE_SEPARATORS = str.maketrans({'/': '-', '\\': '-'})
+    FORMULA_SYMBOLS = ('=', '≥', '≤', '≈')
+    FORMULA_TOKENS = ('Fh', 'Fz', 'σ', 'τ', 'R', 'M', 'Q', 'N')
+    ENGINEERING_KEYWORDS = ('расчет', 'нагруз', 'конструк')
+
+    # Разрешение, до которого уменьшается изображение изделия в документе
+    IMAGE_DPI = 150
+
+    # Категории изделий в родительном падеже
+    CATEGORY_GENITIVE = {
+        'Домики': 'игрового домика',
+        'Игровые комплексы': 'игрового комплекса',
+        'Игровые элементы': 'игрового элемента',
+        'Мини-беседки': 'мини-беседки',
+        'Беседки': 'беседки',
+        'Песочницы': 'песочницы'
+    }
+
+    # Элементы w:settings, которые по схеме следуют за w:updateFields
+    SETTINGS_AFTER_UPDATE_FIELDS = (
+        'w:hdrShapeDefaults', 'w:footnotePr', 'w:endnotePr', 'w:compat', 'w:docVars',
+        'w:rsids', 'm:mathPr', 'w:attachedSchema', 'w:themeFontLang', 'w:clrSchemeMapping',
+        'w:doNotIncludeSubdocsInStats', 'w:doNotAutoCompressPictures', 'w:forceUpgrade',
+        'w:captions', 'w:readModeInkLockDown', 'w:smartTagType', 'sl:schemaLibrary',
+        'w:shapeDefaults', 'w:doNotEmbedSmartTags', 'w:decimalSymbol', 'w:listSeparator',
+    )
+
+    # Параметры Word, отключаемые на время обновления полей (восстанавливаются при выходе)
+    WORD_OPTIONS_OFF = ('CheckSpellingAsYouType', 'CheckGrammarAsYouType', 'Pagination')
+
+    # Экземпляр Word, общий для всех документов процесса (создаётся при первом обращении)
+    _word_app = None
+    _word_options_saved: Dict[str, bool] = {}
     
     def __init__(self, template_path: str, output_dir: str, config_manager, logger):
         """
@@ -35,79 +111,229 @@ class DOCXGenerator:
         self.config = config_manager
         self.logger = logger
         
+        # Шаблон разбирается один раз; для каждого изделия создаётся его копия
+        self._template_doc = Document(template_path)
+        
+        # Без обновления через Word поля (страницы, содержание) обновит сам Word
+        # при первом открытии документа
+        self.update_fields_via_word = config_manager.update_fields_via_word()
+        if not self.update_fields_via_word:
+            self._set_update_fields_on_open(self._template_doc)
+        
+        # XML-части шаблона, кроме основного документа (стили, настройки, нумерация),
+        # при генерации не меняются: сериализуем их один раз для всех документов
+        self._static_part_blobs = {
+            part.partname: part.blob
+            for part in self._template_doc.part.package.iter_parts()
+            if isinstance(part, XmlPart) and part is not self._template_doc.part
+        }
+        # Наличие в шаблоне содержания и формул (определяется по первому документу)
+        self._template_features: Optional[Tuple[bool, bool]] = None
+        
         if not os.path.exists(output_dir):
             os.makedirs(output_dir, exist_ok=True)
+        
+        # Документы сохраняются в фоновых потоках, пока формируется следующий
+        self._save_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='docx-save')
     
-    def generate_document(self, product_data: Dict, technical_data: Dict[str, Tuple[str, str]]) -> str:
+    def generate_document(self, product_data: Product, technical_data: Dict[str, Tuple[str, str]]) -> Future:
         """
         Генерация документа для изделия
+        
+        Документ сохраняется в фоновом потоке; после завершения сохранения
+        поля обновляются вызовом update_fields().
+        
+        Returns:
+            Future, результатом которого является путь к сохранённому файлу
         """
         # Формируем имя выходного файла
-        article = product_data['article'].replace('/', '-').replace('\\', '-')
-        name = product_data['name'][:50]
+        article = product_data.article.translate(self.ARTICLE_SEPARATORS)
+        name = product_data.name[:50]
         name = self._sanitize_filename(name)
         
         output_filename = f"{article}_{name}_РП.docx"
         output_path = os.path.join(self.output_dir, output_filename)
         
-        # Копируем шаблон
-        shutil.copy(self.template_path, output_path)
-        
-        # Открываем документ
-        doc = Document(output_path)
+        # Копируем разобранный шаблон (быстрее повторной распаковки и разбора XML)
+        doc = copy.deepcopy(self._template_doc)
         
         # Обрабатываем документ
         self._process_document(doc, product_data, technical_data)
         
-        # Сохраняем
-        doc.save(output_path)
+        # Сохраняем в фоне
+        return self._save_pool.submit(self._save_document, doc, output_path)
+    
+    def _save_document(self, doc: Document, output_path: str) -> str:
+        """
+        Сохранение документа (выполняется в потоке пула сохранения)
+        
+        Повторяет Document.save(), но для неизменных частей шаблона
+        записывает заранее сериализованный XML.
+        """
+        package = doc.part.package
+        parts = list(package.iter_parts())
+        for part in parts:
+            part.before_marshal()
+        
+        phys_writer = PhysPkgWriter(output_path)
+        try:
+            PackageWriter._write_content_types_stream(phys_writer, parts)
+            PackageWriter._write_pkg_rels(phys_writer, package.rels)
+            for part in parts:
+                blob = self._static_part_blobs.get(part.partname) if part is not doc.part else None
+                phys_writer.write(part.partname, blob if blob is not None else part.blob)
+                if len(part.rels):
+                    phys_writer.write(part.partname.rels_uri, part.rels.xml)
+        finally:
+            phys_writer.close()
+        return output_path
+    
+    def update_fields(self, output_path: str):
+        """
+        Обновление полей сохранённого документа через COM
+        
+        Args:
+            output_path: путь к документу, возвращённый generate_document
+        """
+        if not self.update_fields_via_word:
+            return
         
-        # Обновляем поля
         try:
             self._update_fields_com(output_path)
         except Exception as e:
             self.logger.log_warning(f"Не удалось обновить поля через COM: {str(e)}")
-        
-        return output_path
     
-    def _process_document(self, doc: Document, product_data: Dict, technical_data: Dict):
+    @classmethod
+    def _set_update_fields_on_open(cls, doc: Document):
+        """Включение параметра w:updateFields: Word обновит поля при открытии документа"""
+        settings = doc.settings.element
+        update_fields = settings.find(qn('w:updateFields'))
+        if update_fields is None:
+            update_fields = OxmlElement('w:updateFields')
+            settings.insert_element_before(update_fields, *cls.SETTINGS_AFTER_UPDATE_FIELDS)
+        update_fields.set(qn('w:val'), 'true')
+    
+    def _process_document(self, doc: Document, product_data: Product, technical_data: Dict):
         """
         Полная обработка документа
         """
         # 1. Подготовка данных
         replacements = self._prepare_replacements(product_data, technical_data)
+        replacement_pattern = self._compile_replacements(replacements)
         
-        # 2. Замена текста в параграфах
-        for paragraph in doc.paragraphs:
-            self._replace_in_paragraph(paragraph, replacements)
+        # 2. Замена текста, оформление параграфов и замена в таблицах за один проход
+        image_paragraph, stamp_tables = self._process_body(doc, replacements, replacement_pattern)
         
-        # 3. Замена текста в таблицах (включая штамп)
-        self._update_tables(doc, replacements, product_data)
-
-        # 4. Улучшения оформления
-        self._enhance_engineering_text(doc, product_data, technical_data)
-        self._format_table_of_contents(doc)
-        self._format_formulas(doc)
-        self._update_stamp_metadata(doc, product_data)
+        # 3. Заполнение штампа
+        self._update_stamp_metadata(stamp_tables, product_data)
 
-        # 5. Удаление ненужных параграфов (подписи к рисункам)
-        self._remove_figure_captions(doc)
-
-        # 6. Удаление изображений кроме основного
-        self._remove_extra_images(doc)
-
-        # 7. Вставка изображения изделия
-        if product_data.get('image_path') and os.path.exists(product_data['image_path']):
-            self._insert_main_image(doc, product_data['image_path'])
+        # 4. Вставка изображения изделия
+        if image_paragraph is not None and product_data.image_path and os.path.exists(product_data.image_path):
+            self._insert_main_image(image_paragraph, product_data.image_path)
     
-    def _prepare_replacements(self, product_data: Dict, technical_data: Dict) -> Dict[str, str]:
+    def _process_body(self, doc: Document, replacements: Dict[str, str],
+                      pattern: Pattern) -> Tuple[Optional[Paragraph], List[Table]]:
+        """
+        Обработка тела документа за один проход
+        
+        Для каждого параграфа по порядку выполняются: замена текста,
+        оформление инженерного текста, оформление содержания и формул,
+        удаление подписей к рисункам и лишних изображений. В таблицах
+        заменяется текст параграфов ячеек (каждая ячейка, в т.ч. объединённая, -
+        один раз) и определяются таблицы штампа.
+        
+        Returns:
+            (параграф для вставки основного изображения или None, таблицы штампа)
+        """
+        has_toc, has_formulas = self._detect_features(doc, replacements)
+        
+        # Состояние содержания: до заголовка, внутри, после окончания
+        toc_state = 'before' if has_toc else 'after'
+        kept_paragraphs: List[Tuple[Paragraph, str]] = []
+        captions = []
+        # Параграфы с изображениями находятся одним запросом ко всему телу,
+        # чтобы не проверять прогоны каждого параграфа
+        body_element = doc.element.body
+        picture_paragraphs = set(self.PICTURE_PARAGRAPHS_XPATH(body_element))
+        body = doc._body
+        stamp_tables: List[Table] = []
+        
+        for element in self.BODY_BLOCKS_XPATH(body_element):
+            if element.tag == self.TABLE_TAG:
+                for p in self.CELL_PARAGRAPHS_XPATH(element):
+                    self._replace_in_paragraph(Paragraph(p, None), replacements, pattern)
+                # Штамп определяем по тексту таблицы, не создавая объекты ячеек
+                table_text = ''.join(self.TEXT_NODES_XPATH(element)).lower()
+                if 'разраб' in table_text and 'лист' in table_text:
+                    stamp_tables.append(Table(element, body))
+                continue
+            
+            paragraph = Paragraph(element, body)
+            text = self._replace_in_paragraph(paragraph, replacements, pattern).strip()
+            text_lower = text.lower()
+            
+            self._enhance_engineering_paragraph(paragraph, text_lower)
+            
+            if toc_state == 'before':
+                if 'СОДЕРЖАНИЕ' in text.upper():
+                    toc_state = 'inside'
+            elif toc_state == 'inside':
+                if text:
+                    text = self._format_toc_paragraph(paragraph, text)
+                    text_lower = text.lower()
+                else:
+                    toc_state = 'after'
+            
+            if has_formulas and self._looks_like_formula(text):
+                self._apply_formula_format(paragraph)
+            
+            # Подписи к рисункам удаляются, кроме подписи основного изображения
+            if self._is_figure_caption(text, text_lower):
+                captions.append(paragraph._element)
+                continue
+            
+            if paragraph._p in picture_paragraphs:
+                self._remove_extra_images(paragraph, text_lower)
+            kept_paragraphs.append((paragraph, text))
+        
+        # Подписи удаляются после обхода, одним проходом по собранным элементам
+        for element in captions:
+            element.getparent().remove(element)
+        
+        return self._find_image_paragraph(kept_paragraphs), stamp_tables
+    
+    def _detect_features(self, doc: Document, replacements: Dict[str, str]) -> Tuple[bool, bool]:
+        """
+        Проверка, есть ли в документе содержание и символы формул
+        
+        Текст шаблона одинаков для всех изделий, поэтому он проверяется
+        один раз; для каждого документа проверяются только подставляемые значения.
+        
+        Returns:
+            (есть заголовок содержания, есть символы формул)
+        """
+        if self._template_features is None:
+            body_text = self.ELEMENT_TEXT_XPATH(doc.element.body)
+            self._template_features = (
+                'СОДЕРЖАНИЕ' in body_text.upper(),
+                any(symbol in body_text for symbol in self.FORMULA_SYMBOLS),
+            )
+        
+        has_toc, has_formulas = self._template_features
+        if not (has_toc and has_formulas):
+            values_text = '\n'.join(replacements.values())
+            has_toc = has_toc or 'СОДЕРЖАНИЕ' in values_text.upper()
+            has_formulas = has_formulas or any(symbol in values_text for symbol in self.FORMULA_SYMBOLS)
+        return has_toc, has_formulas
+    
+    def _prepare_replacements(self, product_data: Product, technical_data: Dict) -> Dict[str, str]:
         """
         Подготовка всех замен
         """
-        article = product_data['article']
-        name = product_data['name']
-        category = product_data['category']
-        children_count = product_data['children_count']
+        article = product_data.article
+        name = product_data.name
+        category = product_data.category
+        children_count = product_data.children_count
         
         # Параметры
         mass_child = self.config.get_mass_child()  # 53.8 кг
@@ -130,28 +356,29 @@ class DOCXGenerator:
         wind_value = wind.get('W0') if isinstance(wind, dict) else None
         technical_parameters = self._build_technical_parameters_text(technical_data)
 
+        climate_parts = []
+        if snow_value:
+            climate_parts.append(f"снеговая нагрузка S0 = {snow_value} кг/м²")
+        if wind_value:
+            climate_parts.append(f"ветровое давление W0 = {wind_value} кг/м²")
+        climate_text = f" ({', '.join(climate_parts)})" if climate_parts else ''
+
         enhanced_general = (
             f"{category_texts.get('general_info', 'Объектом расчета является изделие')} {name}"
             f" (артикул {article}). Расчёт выполняется для региона {region}"
-            f" с учётом нормативных климатических воздействий"
+            f" с учётом нормативных климатических воздействий{climate_text}."
         )
-        if snow_value:
-            enhanced_general += f" (снеговая нагрузка S0 = {snow_value} кг/м²"
-        if wind_value:
-            connector = ', ' if snow_value else ' ('
-            enhanced_general += f"{connector}ветровое давление W0 = {wind_value} кг/м²"
-        if snow_value or wind_value:
-            enhanced_general += ")"
-        enhanced_general += "."
 
+        parameters_text = (
+            f" Основные геометрические параметры: {technical_parameters}." if technical_parameters else ''
+        )
         enhanced_description = (
             f"{category_texts.get('construction_description', 'Конструкция представляет собой изделие')}."
             f" В расчёт включено одновременное нахождение {children_count} детей массой"
             f" {mass_child:.1f} кг каждый (суммарная статическая нагрузка {total_mass:.1f} кг)."
             f" При моделировании эксплуатационных воздействий приняты силы: Fh = {Fh:.1f} Н и Fz = {Fz:.0f} Н."
+            f"{parameters_text}"
         )
-        if technical_parameters:
-            enhanced_description += f" Основные геометрические параметры: {technical_parameters}."
 
         enhanced_conclusion = (
             f"{category_texts.get('conclusion', 'По результатам расчета установлено')}"
@@ -160,6 +387,11 @@ class DOCXGenerator:
             f" Конструкция пригодна для безопасной эксплуатации при указанном режиме нагружения."
         )
 
+        # Значения, подставляемые вместо нескольких вариантов записи в шаблоне
+        mass_text = f'{mass_child:.1f} кг'
+        fh_text = f'Fh = {Fh:.1f} Н'
+        fz_text = f'Fz = {Fz:.0f} Н'
+
         # Базовые замены
         replacements = {
             # Титульный лист и штамп
@@ -176,14 +408,14 @@ class DOCXGenerator:
             
             # Нагрузки от детей
             '10 детей': f'{children_count} детей',
-            '32.5 кг': f'{mass_child:.1f} кг',
-            '32,5 кг': f'{mass_child:.1f} кг',
+            '32.5 кг': mass_text,
+            '32,5 кг': mass_text,
             
             # Силы
-            'Fh = 646,8 Н': f'Fh = {Fh:.1f} Н',
-            'Fh = 646.8 Н': f'Fh = {Fh:.1f} Н',
-            'Fz = 6468 Н': f'Fz = {Fz:.0f} Н',
-            'Fz = 6468.0 Н': f'Fz = {Fz:.0f} Н',
+            'Fh = 646,8 Н': fh_text,
+            'Fh = 646.8 Н': fh_text,
+            'Fz = 6468 Н': fz_text,
+            'Fz = 6468.0 Н': fz_text,
         }
 
         if category_texts.get('general_info'):
@@ -209,106 +441,112 @@ class DOCXGenerator:
             parameters.append(f"{param} — {value}{unit_text}")
         return ', '.join(parameters)
     
-    @staticmethod
-    def _get_category_genitive(category: str) -> str:
+    @classmethod
+    def _get_category_genitive(cls, category: str) -> str:
         """Категория в родительном падеже"""
-        genitive_map = {
-            'Домики': 'игрового домика',
-            'Игровые комплексы': 'игрового комплекса',
-            'Игровые элементы': 'игрового элемента',
-            'Мини-беседки': 'мини-беседки',
-            'Беседки': 'беседки',
-            'Песочницы': 'песочницы'
-        }
-        return genitive_map.get(category, 'конструкции')
+        return cls.CATEGORY_GENITIVE.get(category, 'конструкции')
+    
+    @classmethod
+    def _compile_replacements(cls, replacements: Dict[str, str]) -> Pattern:
+        """
+        Сборка всех заменяемых фрагментов в одно регулярное выражение
+        
+        Более длинные фрагменты идут первыми, поэтому при пересечении
+        заменяется самый длинный (например, 'арт.810152' раньше '810152').
+        """
+        # Набор заменяемых фрагментов одинаков для всех изделий - меняются только значения
+        return cls._compile_keys(tuple(replacements))
     
     @staticmethod
-    def _replace_in_paragraph(paragraph, replacements: Dict[str, str]):
-        """Замена текста в параграфе"""
-        full_text = paragraph.text
-        
-        modified = False
-        for old_text, new_text in replacements.items():
-            if old_text in full_text:
-                full_text = full_text.replace(old_text, new_text)
-                modified = True
-        
-        if modified:
-            if paragraph.runs:
-                for run in paragraph.runs[1:]:
-                    run.text = ''
-                paragraph.runs[0].text = full_text
-            else:
-                paragraph.text = full_text
+    @lru_cache(maxsize=16)
+    def _compile_keys(keys: Tuple[str, ...]) -> Pattern:
+        """Регулярное выражение для набора фрагментов (кэшируется по набору)"""
+        ordered = sorted(keys, key=len, reverse=True)
+        return re.compile('|'.join(map(re.escape, ordered)))
     
-    def _update_tables(self, doc: Document, replacements: Dict[str, str], product_data: Dict):
+    @classmethod
+    def _paragraph_text(cls, p) -> str:
         """
-        Обновление таблиц (включая штамп)
+        Текст параграфа, совпадающий с Paragraph.text
+        
+        Читается напрямую из XML одним скомпилированным запросом, без создания
+        объектов прогонов; элементы python-docx сами преобразуются в текст
+        (w:tab - табуляция, w:br - перенос строки и т.д.)
         """
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        self._replace_in_paragraph(paragraph, replacements)
-
-    def _enhance_engineering_text(self, doc: Document, product_data: Dict, technical_data: Dict):
-        """Выравнивание инженерных абзацев"""
-        keywords = ['расчет', 'нагруз', 'конструк']
-        for paragraph in doc.paragraphs:
-            text = paragraph.text.strip()
-            if not text:
-                continue
-            if any(keyword in text.lower() for keyword in keywords):
-                fmt = paragraph.paragraph_format
-                fmt.space_after = Pt(6)
-                fmt.space_before = Pt(6)
-                for run in paragraph.runs:
-                    run.font.name = 'Times New Roman'
-                    run.font.size = Pt(12)
-
-    def _format_table_of_contents(self, doc: Document):
-        """Приведение содержания к аккуратному виду"""
-        toc_started = False
-        toc_paragraphs: List[Paragraph] = []
-
-        for paragraph in doc.paragraphs:
-            text = paragraph.text.strip()
-            if not toc_started and 'СОДЕРЖАНИЕ' in text.upper():
-                toc_started = True
-                continue
-
-            if toc_started:
-                if not text:
-                    break
-                toc_paragraphs.append(paragraph)
-
-        if not toc_paragraphs:
+        return ''.join(map(str, cls.PARAGRAPH_TEXT_XPATH(p)))
+    
+    @classmethod
+    def _replace_in_paragraph(cls, paragraph, replacements: Dict[str, str], pattern: Pattern) -> str:
+        """
+        Замена текста в параграфе за один проход
+        
+        Returns:
+            Текст параграфа после замены
+        """
+        text = cls._paragraph_text(paragraph._p)
+        full_text, count = pattern.subn(lambda match: replacements[match.group(0)], text)
+        
+        # Параграфы без совпадений (подавляющее большинство) не перезаписываются
+        if count:
+            # Весь текст записывается в первый прогон, остальные прогоны удаляются
+            # целиком (без создания объектов Run и очистки каждого по отдельности)
+            p = paragraph._p
+            r_elements = p.r_lst
+            if r_elements:
+                for r in r_elements[1:]:
+                    p.remove(r)
+                r_elements[0].text = full_text
+            else:
+                paragraph.text = full_text
+            return cls._paragraph_text(paragraph._p)
+        
+        return text
+    
+    @classmethod
+    def _enhance_engineering_paragraph(cls, paragraph: Paragraph, text_lower: str):
+        """Выравнивание инженерного абзаца"""
+        if not text_lower:
             return
-
-        tab_position = Inches(6.2)
-        for paragraph in toc_paragraphs:
-            has_field = bool(paragraph._p.xpath('.//w:fldChar'))
-            if not has_field:
-                formatted_text = self._normalize_toc_text(paragraph.text.strip())
-                if formatted_text:
-                    self._replace_paragraph_text(paragraph, formatted_text)
-
+        if any(keyword in text_lower for keyword in cls.ENGINEERING_KEYWORDS):
             fmt = paragraph.paragraph_format
-            fmt.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            fmt.left_indent = Pt(0)
-            fmt.first_line_indent = Pt(0)
-            fmt.space_before = Pt(0)
-            fmt.space_after = Pt(0)
-            fmt.keep_lines_together = True
-            fmt.keep_with_next = True
-            if fmt.tab_stops:
-                fmt.tab_stops.clear_all()
-            fmt.tab_stops.add_tab_stop(tab_position, WD_TAB_ALIGNMENT.RIGHT, WD_TAB_LEADER.DOTS)
-
+            fmt.space_after = Pt(6)
+            fmt.space_before = Pt(6)
             for run in paragraph.runs:
                 run.font.name = 'Times New Roman'
                 run.font.size = Pt(12)
 
+    def _format_toc_paragraph(self, paragraph: Paragraph, text: str) -> str:
+        """
+        Приведение строки содержания к аккуратному виду
+        
+        Returns:
+            Текст параграфа после оформления
+        """
+        has_field = self.HAS_FIELD_XPATH(paragraph._p)
+        if not has_field:
+            formatted_text = self._normalize_toc_text(text)
+            if formatted_text:
+                self._replace_paragraph_text(paragraph, formatted_text)
+                text = self._paragraph_text(paragraph._p).strip()
+
+        fmt = paragraph.paragraph_format
+        fmt.alignment = WD_ALIGN_PARAGRAPH.LEFT
+        fmt.left_indent = Pt(0)
+        fmt.first_line_indent = Pt(0)
+        fmt.space_before = Pt(0)
+        fmt.space_after = Pt(0)
+        fmt.keep_lines_together = True
+        fmt.keep_with_next = True
+        if fmt.tab_stops:
+            fmt.tab_stops.clear_all()
+        fmt.tab_stops.add_tab_stop(Inches(6.2), WD_TAB_ALIGNMENT.RIGHT, WD_TAB_LEADER.DOTS)
+
+        for run in paragraph.runs:
+            run.font.name = 'Times New Roman'
+            run.font.size = Pt(12)
+        
+        return text
+
     def _normalize_toc_text(self, text: str) -> Optional[str]:
         """Формирование строки содержания с табуляцией"""
         if not text:
@@ -316,7 +554,7 @@ class DOCXGenerator:
         if '\t' in text:
             return text
 
-        match = re.match(r'^(?P<num>\d+)\s*[\.\)]?\s*(?P<title>.+?)\s*(?:\.+|\s)+(?P<page>\d+)$', text)
+        match = self.TOC_LINE_RE.match(text)
         if match:
             number = match.group('num').strip()
             title = match.group('title').strip().strip('.')
@@ -329,25 +567,16 @@ class DOCXGenerator:
         if text:
             paragraph.add_run(text)
 
-    def _format_formulas(self, doc: Document):
-        """Форматирование формул"""
-        for paragraph in doc.paragraphs:
-            text = paragraph.text.strip()
-            if self._looks_like_formula(text):
-                self._apply_formula_format(paragraph)
-
-    @staticmethod
-    def _looks_like_formula(text: str) -> bool:
-        if not text:
-            return False
-        if '=' not in text and not any(symbol in text for symbol in ['≥', '≤', '≈']):
+    @classmethod
+    def _looks_like_formula(cls, text: str) -> bool:
+        # Сначала дешёвые проверки: пустой или длинный текст формулой не считается
+        if not text or len(text) > 120:
             return False
-        if len(text) > 120:
+        if not any(symbol in text for symbol in cls.FORMULA_SYMBOLS):
             return False
-        formula_tokens = ['Fh', 'Fz', 'σ', 'τ', 'R', 'M', 'Q', 'N']
-        if any(token in text for token in formula_tokens):
+        if any(token in text for token in cls.FORMULA_TOKENS):
             return True
-        return bool(re.match(r'^[A-Za-zА-Яа-я0-9\s\(\)\+\-\*=\/.,≥≤≈]+$', text))
+        return bool(cls.FORMULA_RE.match(text))
 
     def _apply_formula_format(self, paragraph: Paragraph):
         fmt = paragraph.paragraph_format
@@ -360,112 +589,91 @@ class DOCXGenerator:
             run.font.name = 'Times New Roman'
             run.font.size = Pt(12)
     
-    def _remove_figure_captions(self, doc: Document):
+    @staticmethod
+    def _is_figure_caption(text: str, text_lower: str) -> bool:
         """
-        Удаление подписей к рисункам
+        Проверка, является ли параграф подписью к рисунку, подлежащей удалению
         """
-        paragraphs_to_remove = []
-        
-        for i, paragraph in enumerate(doc.paragraphs):
-            text = paragraph.text.strip()
+        # Любая подпись содержит "рис", поэтому остальные проверки
+        # выполняются только для таких параграфов
+        if 'рис' not in text_lower:
+            return False
+        if text.startswith(('Рис.', 'На Рис.')) or 'приведен' in text_lower:
             
-            # Удаляем параграфы с подписями к рисункам
-            if (text.startswith('Рис.') or 
-                text.startswith('На Рис.') or
-                'приведен' in text.lower() and 'рис' in text.lower()):
-                
-                # Сохраняем только "Рис. 1. Общий вид конструкции" - для основного изображения
-                if not ('Общий вид' in text and 'Рис. 1' in text):
-                    paragraphs_to_remove.append(paragraph)
-        
-        # Удаляем параграфы
-        for paragraph in paragraphs_to_remove:
-            p_element = paragraph._element
-            p_element.getparent().remove(p_element)
+            # Сохраняем только "Рис. 1. Общий вид конструкции" - для основного изображения
+            return not ('Общий вид' in text and 'Рис. 1' in text)
+        return False
     
-    def _remove_extra_images(self, doc: Document):
+    def _remove_extra_images(self, paragraph: Paragraph, text_lower: str):
         """
-        Удаление всех изображений кроме основного
+        Удаление изображений параграфа, если он не относится к основному рисунку
         """
-        for paragraph in doc.paragraphs:
-            text_lower = paragraph.text.lower()
-            keep_image = (
-                'рис. 1' in text_lower or
-                'рис.1' in text_lower or
-                'общий вид' in text_lower
-            )
-
-            if keep_image:
-                continue
+        keep_image = (
+            'рис. 1' in text_lower or
+            'рис.1' in text_lower or
+            'общий вид' in text_lower
+        )
 
-            for run in paragraph.runs:
-                drawings = run._element.findall(
-                    './/{http://schemas.openxmlformats.org/wordprocessingml/2006/main}drawing'
-                )
-                for drawing in drawings:
-                    if not self._is_inline_picture(drawing):
-                        continue
-                    parent = drawing.getparent()
-                    if parent is not None:
-                        parent.remove(drawing)
+        if keep_image:
+            return
 
-    def _is_inline_picture(self, drawing) -> bool:
-        """Проверка, является ли объект встроенным изображением"""
-        if drawing is None:
-            return False
-        inline_nodes = drawing.xpath('.//wp:inline', namespaces=self.XML_NAMESPACES)
-        return bool(inline_nodes)
+        for drawing in self.RUN_INLINE_PICTURES_XPATH(paragraph._p):
+            parent = drawing.getparent()
+            if parent is not None:
+                parent.remove(drawing)
 
-    def _update_stamp_metadata(self, doc: Document, product_data: Dict):
-        """Автоматическое заполнение штампа"""
-        if not doc.tables:
+    def _update_stamp_metadata(self, tables: List[Table], product_data: Product):
+        """
+        Автоматическое заполнение штампа
+        
+        Args:
+            tables: таблицы штампа, найденные при обходе тела документа
+        """
+        if not tables:
             return
 
-        article = product_data.get('article', '')
-        name = product_data.get('name', '')
+        article = product_data.article
+        name = product_data.name
         document_name = f"Расчет на прочность {name}" if name else 'Расчет на прочность'
         today = datetime.now().strftime('%d.%m.%Y')
 
-        for table in doc.tables:
-            table_text = ' '.join(cell.text.lower() for row in table.rows for cell in row.cells if cell.text)
-            if not table_text:
-                continue
-            if 'разраб' not in table_text or 'лист' not in table_text:
-                continue
-
+        for table in tables:
             for row in table.rows:
-                for idx, cell in enumerate(row.cells):
+                # row.cells строит сетку всей таблицы, поэтому получаем ячейки строки один раз
+                cells = row.cells
+                for idx, cell in enumerate(cells):
                     cell_text = cell.text.strip().lower()
                     if not cell_text:
                         continue
 
                     if 'наимен' in cell_text:
-                        self._write_to_neighbor(row, idx, name or document_name)
+                        self._write_to_neighbor(cells, idx, name or document_name)
                     elif 'обознач' in cell_text or 'номер документа' in cell_text or '№ докум' in cell_text:
                         value = f"арт.{article}" if article else article
-                        self._write_to_neighbor(row, idx, value)
+                        self._write_to_neighbor(cells, idx, value)
                     elif cell_text == 'лист':
                         self._set_cell_text(cell, '1')
                     elif 'листов' in cell_text:
                         self._set_cell_text(cell, '1')
                     elif cell_text == 'масштаб':
-                        self._write_to_neighbor(row, idx, '1:10')
+                        self._write_to_neighbor(cells, idx, '1:10')
                     elif cell_text == 'дата':
-                        self._write_to_neighbor(row, idx, today)
+                        self._write_to_neighbor(cells, idx, today)
                     elif 'разраб' in cell_text:
-                        self._write_to_neighbor(row, idx, 'Автогенератор')
+                        self._write_to_neighbor(cells, idx, 'Автогенератор')
                     elif 'пров.' in cell_text or 'н.контр' in cell_text:
-                        self._write_to_neighbor(row, idx, 'Контроль СК')
+                        self._write_to_neighbor(cells, idx, 'Контроль СК')
 
-    def _write_to_neighbor(self, row, idx: int, value: str):
+    def _write_to_neighbor(self, cells, idx: int, value: str):
         if not value:
             return
-        target_idx = idx + 1 if idx + 1 < len(row.cells) else idx
-        self._set_cell_text(row.cells[target_idx], value)
+        target_idx = idx + 1 if idx + 1 < len(cells) else idx
+        self._set_cell_text(cells[target_idx], value)
 
     def _set_cell_text(self, cell, text: str):
         cell.text = ''
-        paragraph = cell.paragraphs[0] if cell.paragraphs else cell.add_paragraph()
+        paragraphs = cell.paragraphs
+        paragraph = paragraphs[0] if paragraphs else cell.add_paragraph()
         paragraph.clear()
         run = paragraph.add_run(text)
         run.font.name = 'Times New Roman'
@@ -484,99 +692,184 @@ class DOCXGenerator:
         next_element = paragraph._p.getnext()
         if next_element is not None:
             next_paragraph = Paragraph(next_element, paragraph._parent)
-            if 'рис' in next_paragraph.text.lower():
+            if 'рис' in self._paragraph_text(next_element).lower():
                 self._replace_paragraph_text(next_paragraph, caption_text)
                 next_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                if next_paragraph.runs:
-                    next_paragraph.runs[0].font.italic = True
-                    next_paragraph.runs[0].font.size = Pt(11)
+                self._format_caption_runs(next_paragraph)
                 return
 
         caption_paragraph = self._insert_paragraph_after(paragraph)
         self._replace_paragraph_text(caption_paragraph, caption_text)
         caption_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        if caption_paragraph.runs:
-            caption_paragraph.runs[0].font.italic = True
-            caption_paragraph.runs[0].font.size = Pt(11)
+        self._format_caption_runs(caption_paragraph)
     
-    def _insert_main_image(self, doc: Document, image_path: str):
+    @staticmethod
+    def _format_caption_runs(paragraph: Paragraph):
+        """Курсив и размер шрифта для первого прогона подписи"""
+        runs = paragraph.runs
+        if runs:
+            runs[0].font.italic = True
+            runs[0].font.size = Pt(11)
+    
+    @staticmethod
+    def _find_image_paragraph(paragraphs: List[Tuple[Paragraph, str]]) -> Optional[Paragraph]:
+        """
+        Поиск параграфа для основного изображения
+        
+        Args:
+            paragraphs: оставшиеся в документе параграфы с их текстом
+            
+        Returns:
+            Параграф с "Рис. 1" (или третий после "ОБЩИЕ СВЕДЕНИЯ") либо None
+        """
+        for paragraph, text in paragraphs:
+            if 'Рис. 1' in text or ('Общий вид' in text and 'конструкци' in text):
+                return paragraph
+        
+        # Если не нашли, ищем после "ОБЩИЕ СВЕДЕНИЯ"
+        for i, (paragraph, text) in enumerate(paragraphs):
+            if 'ОБЩИЕ СВЕДЕНИЯ' in text:
+                if i + 3 < len(paragraphs):
+                    return paragraphs[i + 3][0]
+                break
+        
+        return None
+    
+    def _insert_main_image(self, target_paragraph: Paragraph, image_path: str):
         """
         Вставка основного изображения
         """
         try:
-            # Ищем параграф с "Рис. 1" или создаём после "ОБЩИЕ СВЕДЕНИЯ"
-            target_paragraph = None
-            
-            for paragraph in doc.paragraphs:
-                text = paragraph.text
-                if 'Рис. 1' in text or ('Общий вид' in text and 'конструкци' in text):
-                    target_paragraph = paragraph
-                    break
-            
-            # Если не нашли, ищем после "ОБЩИЕ СВЕДЕНИЯ"
-            if not target_paragraph:
-                for i, paragraph in enumerate(doc.paragraphs):
-                    if 'ОБЩИЕ СВЕДЕНИЯ' in paragraph.text:
-                        if i + 3 < len(doc.paragraphs):
-                            target_paragraph = doc.paragraphs[i + 3]
-                        break
-            
             if target_paragraph:
-                # Открываем изображение
-                img = Image.open(image_path)
-                width, height = img.size
+                from PIL import Image
                 
-                # Масштабируем
-                max_width = 6.0
-                if width > height:
-                    new_width = max_width
-                    new_height = (height / width) * max_width
-                else:
-                    new_height = max_width
-                    new_width = (width / height) * max_width
+                # Открываем изображение
+                with Image.open(image_path) as img:
+                    width, height = img.size
+                    
+                    # Масштабируем
+                    max_width = 6.0
+                    if width > height:
+                        new_width = max_width
+                        new_height = (height / width) * max_width
+                    else:
+                        new_height = max_width
+                        new_width = (width / height) * max_width
+                    
+                    picture = self._prepare_picture(img, image_path, new_width, new_height)
                 
                 # Удаляем существующие изображения в этом параграфе
-                for run in target_paragraph.runs:
-                    drawings = run._element.findall('.//{http://schemas.openxmlformats.org/wordprocessingml/2006/main}drawing')
-                    for drawing in drawings:
-                        parent = drawing.getparent()
-                        parent.remove(drawing)
+                for drawing in self.RUN_DRAWINGS_XPATH(target_paragraph._p):
+                    drawing.getparent().remove(drawing)
                 
                 # Очищаем текст если он короткий
-                if len(target_paragraph.text.strip()) < 50:
+                if len(self._paragraph_text(target_paragraph._p).strip()) < 50:
                     target_paragraph.clear()
                 
                 # Добавляем изображение
                 run = target_paragraph.add_run()
-                run.add_picture(image_path, width=Inches(new_width))
+                run.add_picture(picture, width=Inches(new_width))
                 target_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
                 self._add_image_caption(target_paragraph, "Рис.1 Общий вид изделия")
 
         except Exception as e:
             self.logger.log_warning(f"Ошибка вставки изображения: {str(e)}")
     
-    @staticmethod
-    def _update_fields_com(doc_path: str):
+    @classmethod
+    def _prepare_picture(cls, img: 'Image.Image', image_path: str, width_in: float, height_in: float):
         """
-        Обновление полей через COM
+        Уменьшение изображения до размера, в котором оно выводится в документе
+        
+        Args:
+            img: открытое изображение
+            image_path: путь к исходному файлу
+            width_in, height_in: размер изображения в документе, дюймы
+            
+        Returns:
+            Путь к исходному файлу, если уменьшение не требуется, иначе BytesIO
         """
-        try:
+        target_size = (max(1, round(width_in * cls.IMAGE_DPI)), max(1, round(height_in * cls.IMAGE_DPI)))
+        if img.width <= target_size[0] and img.height <= target_size[1]:
+            return image_path
+        
+        from PIL import Image
+        
+        source_format = img.format
+        img.thumbnail(target_size, Image.LANCZOS)
+        
+        buffer = BytesIO()
+        if source_format == 'JPEG':
+            img.save(buffer, format='JPEG', quality=85)
+        else:
+            if img.mode not in ('1', 'L', 'LA', 'P', 'RGB', 'RGBA', 'I'):
+                img = img.convert('RGBA')
+            img.save(buffer, format='PNG')
+        buffer.seek(0)
+        return buffer
+    
+    @classmethod
+    def _get_word_app(cls):
+        """
+        Получить скрытый экземпляр Word, общий для всех документов
+        
+        Запуск Word занимает секунды, поэтому он создаётся один раз
+        и закрывается при завершении программы.
+        """
+        if cls._word_app is None:
+            import win32com.client
+            
             word = win32com.client.DispatchEx("Word.Application")
             word.Visible = False
-            doc = word.Documents.Open(os.path.abspath(doc_path))
-            doc.Fields.Update()
-            for toc in doc.TablesOfContents:
-                toc.Update()
-            doc.Save()
-            doc.Close()
+            word.DisplayAlerts = 0
+            word.ScreenUpdating = False
+            
+            # Настройки Options сохраняются в профиле пользователя,
+            # поэтому запоминаем исходные значения для восстановления
+            cls._word_options_saved = {}
+            for option in cls.WORD_OPTIONS_OFF:
+                cls._word_options_saved[option] = getattr(word.Options, option)
+                setattr(word.Options, option, False)
+            
+            cls._word_app = word
+            atexit.register(cls._quit_word_app)
+        return cls._word_app
+    
+    @classmethod
+    def _quit_word_app(cls):
+        """Восстановление настроек и закрытие общего экземпляра Word"""
+        word = cls._word_app
+        if word is None:
+            return
+        cls._word_app = None
+        atexit.unregister(cls._quit_word_app)
+        try:
+            for option, value in cls._word_options_saved.items():
+                setattr(word.Options, option, value)
             word.Quit()
+        except Exception:
+            pass
+    
+    @classmethod
+    def _update_fields_com(cls, doc_path: str):
+        """
+        Обновление полей через COM
+        """
+        try:
+            word = cls._get_word_app()
+            doc = word.Documents.Open(os.path.abspath(doc_path))
+            try:
+                doc.Fields.Update()
+                for toc in doc.TablesOfContents:
+                    toc.Update()
+                doc.Save()
+            finally:
+                doc.Close(0)
         except Exception as e:
+            # Word мог завершиться аварийно - следующий документ откроет новый экземпляр
+            cls._quit_word_app()
             raise Exception(f"Ошибка обновления полей: {str(e)}")
     
-    @staticmethod
-    def _sanitize_filename(filename: str) -> str:
+    @classmethod
+    def _sanitize_filename(cls, filename: str) -> str:
         """Очистка имени файла"""
-        invalid_chars = '<>:"/\\|?*'
-        for char in invalid_chars:
-            filename = filename.replace(char, '_')
-        return filename.strip()
+        return filename.translate(cls.INVALID_FILENAME_CHARS).strip()
@@ -1,14 +1,49 @@
 """
 Модуль для чтения данных из Excel файла с каталогом изделий
 """
+import numpy as np
 import pandas as pd
 import os
-from typing import List, Dict, Optional
+from dataclasses import dataclass
+from itertools import repeat
+from typing import Iterable, Iterator, List, Dict, Optional
+
+
+@dataclass
+class Product:
+    """Данные изделия из строки Excel каталога"""
+    
+    __slots__ = ('article', 'name', 'image_path', 'children_count', 'category', 'row_index')
+    
+    article: str          # Артикул
+    name: str             # Наименование
+    image_path: str       # Путь к картинке
+    children_count: int   # Количество детей
+    category: str         # Категория изделия
+    row_index: int        # Индекс строки в Excel
 
 
 class ExcelReader:
     """Класс для чтения данных из Excel файла"""
     
+    # Версия формата результата get_products.
+    # Увеличивать при изменении логики чтения, чтобы сбросить кэш Excel
+    CACHE_VERSION = 3
+    
+    # Категории по фрагментам наименования (в нижнем регистре), в порядке приоритета
+    CATEGORY_RULES = (
+        ('домик', 'Домики'),
+        ('комплекс', 'Игровые комплексы'),
+        ('песочниц', 'Песочницы'),
+        ('мини-беседк|миниbeседк', 'Мини-беседки'),
+        ('беседк', 'Беседки'),
+    )
+    DEFAULT_CATEGORY = 'Игровые элементы'
+    
+    # Столбцы, читаемые как текст (иначе числовой артикул в столбце
+    # с пустыми ячейками читается как float: '810152.0')
+    TEXT_COLUMNS = ('article', 'name', 'image_path')
+    
     def __init__(self, excel_path: str, column_mapping: Dict[str, str]):
         """
         Инициализация ридера Excel
@@ -20,6 +55,8 @@ class ExcelReader:
         self.excel_path = excel_path
         self.column_mapping = column_mapping
         self.df = None
+        # Позиции столбцов маппинга в загруженном DataFrame
+        self._column_positions: Dict[str, int] = {}
     
     def load_data(self) -> bool:
         """
@@ -31,68 +68,86 @@ class ExcelReader:
         if not os.path.exists(self.excel_path):
             raise FileNotFoundError(f"Excel файл не найден: {self.excel_path}")
         
+        # Читаем только столбцы из маппинга, остальные не разбираются
+        column_indices = {
+            key: self._column_letter_to_index(letter)
+            for key, letter in self.column_mapping.items()
+        }
+        usecols = sorted(set(column_indices.values()))
+        
         try:
-            # Читаем Excel, начиная со второй строки (индекс 1), если есть заголовок
-            self.df = pd.read_excel(self.excel_path, engine='openpyxl')
+            try:
+                positions = {key: usecols.index(index) for key, index in column_indices.items()}
+                text_dtypes = {positions[key]: str for key in self.TEXT_COLUMNS if key in positions}
+                self.df = pd.read_excel(
+                    self.excel_path, engine='openpyxl', usecols=usecols, dtype=text_dtypes
+                )
+                self._column_positions = positions
+            except pd.errors.ParserError:
+                # Часть столбцов маппинга отсутствует в файле - читаем лист целиком.
+                # Число столбцов заранее неизвестно, поэтому как текст читаются все
+                # (количество детей всё равно преобразуется в число при разборе)
+                self.df = pd.read_excel(self.excel_path, engine='openpyxl', dtype=str)
+                self._column_positions = column_indices
             return True
         except Exception as e:
             raise Exception(f"Ошибка чтения Excel файла: {str(e)}")
     
-    def get_products(self) -> List[Dict[str, any]]:
+    def get_products(self) -> List[Product]:
         """
         Получить список изделий из Excel
         
         Returns:
-            Список словарей с данными изделий
+            Список изделий
+        """
+        return list(self.iter_products())
+    
+    def iter_products(self) -> Iterator[Product]:
+        """
+        Последовательно получить изделия из Excel
+        
+        Изделия выдаются по мере разбора строк, без построения общего списка.
+        
+        Returns:
+            Итератор изделий
         """
         if self.df is None:
             raise Exception("Данные не загружены. Вызовите load_data() сначала.")
         
-        products = []
+        # Значения столбцов извлекаются целиком (без объекта Series на каждую строку)
+        rows = zip(
+            self.df.index,
+            self._column_values('article'),
+            self._column_values('name'),
+            self._column_values('image_path'),
+            self._children_counts(),
+            self._determine_categories(),
+        )
         
-        # Получаем индексы столбцов из букв (A=0, B=1, C=2, D=3, E=4)
-        col_article = self._column_letter_to_index(self.column_mapping['article'])
-        col_name = self._column_letter_to_index(self.column_mapping['name'])
-        col_image = self._column_letter_to_index(self.column_mapping['image_path'])
-        col_children = self._column_letter_to_index(self.column_mapping['children_count'])
-        
-        for idx, row in self.df.iterrows():
+        for idx, article, name, image_path, children_count, category in rows:
             try:
-                # Извлекаем данные по индексам столбцов
-                article = self._safe_get_value(row, col_article)
-                name = self._safe_get_value(row, col_name)
-                image_path = self._safe_get_value(row, col_image)
-                children_count = self._safe_get_value(row, col_children)
-                
                 # Пропускаем строки с пустым артикулом или наименованием
                 if not article or not name:
                     continue
                 
-                # Определяем категорию (по умолчанию из наименования)
-                category = self._determine_category(name)
-                
-                # Преобразуем количество детей в число
-                try:
-                    children_count = int(float(children_count)) if children_count else 1
-                except (ValueError, TypeError):
-                    children_count = 1
-                
-                product = {
-                    'article': str(article).strip(),
-                    'name': str(name).strip(),
-                    'image_path': str(image_path).strip() if image_path else '',
-                    'children_count': children_count,
-                    'category': category,
-                    'row_index': idx
-                }
+                # Категория не определяется, если наименование не текст
+                if category is None:
+                    continue
                 
-                products.append(product)
+                product = Product(
+                    article=str(article).strip(),
+                    name=str(name).strip(),
+                    image_path=str(image_path).strip() if image_path else '',
+                    children_count=children_count,
+                    category=category,
+                    row_index=idx
+                )
                 
             except Exception as e:
                 # Пропускаем строку с ошибкой
                 continue
-        
-        return products
+            
+            yield product
     
     @staticmethod
     def _column_letter_to_index(letter: str) -> int:
@@ -111,52 +166,72 @@ class ExcelReader:
             index = index * 26 + (ord(char) - ord('A') + 1)
         return index - 1
     
-    @staticmethod
-    def _safe_get_value(row, col_index: int):
+    def _column_values(self, key: str) -> Iterable:
         """
-        Безопасное получение значения из строки по индексу
+        Значения столбца маппинга по всем строкам
         
         Args:
-            row: строка DataFrame
-            col_index: индекс столбца
+            key: ключ маппинга (article, name, image_path, children_count)
             
         Returns:
-            Значение ячейки или None
+            Значения ячеек, пустые (NaN) заменены на None; для столбца,
+            отсутствующего в файле, - None для каждой строки
         """
-        try:
-            value = row.iloc[col_index]
-            # Проверяем на NaN
-            if pd.isna(value):
-                return None
-            return value
-        except (IndexError, KeyError):
-            return None
+        # Позиция столбца в DataFrame определена при загрузке по букве из маппинга
+        col_index = self._column_positions[key]
+        if col_index >= len(self.df.columns):
+            return repeat(None)
+        
+        column = self.df.iloc[:, col_index].astype(object)
+        return column.where(column.notna(), None).tolist()
     
-    @staticmethod
-    def _determine_category(name: str) -> str:
+    def _children_counts(self) -> Iterable[int]:
         """
-        Определение категории изделия по наименованию
+        Количество детей по строкам
         
-        Args:
-            name: наименование изделия
-            
         Returns:
-            Категория изделия
-        """
-        name_lower = name.lower()
-        
-        if 'домик' in name_lower:
-            return 'Домики'
-        elif 'комплекс' in name_lower:
-            return 'Игровые комплексы'
-        elif 'песочниц' in name_lower:
-            return 'Песочницы'
-        elif 'мини-беседк' in name_lower or 'миниbeседк' in name_lower:
-            return 'Мини-беседки'
-        elif 'беседк' in name_lower:
-            return 'Беседки'
-        else:
-            return 'Игровые элементы'
+            Целые значения столбца; пустые, нулевые и нечисловые значения
+            заменены на 1
+        """
+        col_index = self._column_positions['children_count']
+        if col_index >= len(self.df.columns):
+            return repeat(1)
+        
+        counts = pd.to_numeric(self.df.iloc[:, col_index], errors='coerce')
+        counts = counts.where(np.isfinite(counts) & (counts != 0), 1)
+        return counts.astype('int64').tolist()
+    
+    def _determine_categories(self) -> Iterable[Optional[str]]:
+        """
+        Определение категорий изделий по наименованиям всех строк
+        
+        Проверки выполняются над всем столбцом сразу; первое сработавшее
+        правило CATEGORY_RULES задаёт категорию, иначе - DEFAULT_CATEGORY.
+        
+        Returns:
+            Категории по строкам; None, если наименование не текст
+        """
+        col_index = self._column_positions['name']
+        if col_index >= len(self.df.columns):
+            return repeat(None)
+        
+        names = self.df.iloc[:, col_index]
+        if names.dtype != object:
+            return repeat(None)
+        
+        # Для значений, не являющихся строками, str.lower() даёт NaN
+        names_lower = names.str.lower()
+        conditions = [
+            names_lower.str.contains(pattern, regex=True, na=False)
+            for pattern, _ in self.CATEGORY_RULES
+        ]
+        choices = [category for _, category in self.CATEGORY_RULES]
+        categories = pd.Series(
+            np.select(conditions, choices, default=self.DEFAULT_CATEGORY),
+            index=names.index,
+            dtype=object,
+        )
+        return categories.where(names_lower.notna(), None).tolist()
     
     def get_product_count(self) -> int:
         """Получить количество изделий в Excel"""
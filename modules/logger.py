@@ -2,7 +2,9 @@
 Модуль логирования для программы генерации расчётов на прочность
 """
 import logging
+import logging.handlers
 import os
+from collections import Counter
 from datetime import datetime
 from typing import Optional
 
@@ -10,31 +12,43 @@ from typing import Optional
 class RPLogger:
     """Класс для логирования работы программы"""
     
-    def __init__(self, log_file_path: str):
+    def __init__(self, log_file_path: str, log_queue=None):
         """
         Инициализация логгера
         
         Args:
             log_file_path: путь к файлу лога
+            log_queue: очередь для передачи записей в главный процесс
+                       (задаётся в рабочих процессах параллельной обработки)
         """
         self.log_file_path = log_file_path
         self.stats = {
             'total': 0,
             'success': 0,
-            'errors': {}
+            'errors': Counter()
         }
         
+        self.logger = logging.getLogger('RPGenerator')
+        self.logger.setLevel(logging.INFO)
+        self._file_buffer: Optional[logging.handlers.MemoryHandler] = None
+        
+        if log_queue is not None:
+            # В рабочем процессе все записи уходят в главный процесс
+            for handler in list(self.logger.handlers):
+                self.logger.removeHandler(handler)
+            self.logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        else:
+            self._setup_handlers(log_file_path)
+    
+    def _setup_handlers(self, log_file_path: str):
+        """Настройка файлового и консольного обработчиков"""
         # Создаём директорию для лога, если её нет
         log_dir = os.path.dirname(log_file_path)
         if log_dir and not os.path.exists(log_dir):
             os.makedirs(log_dir, exist_ok=True)
         
-        # Настройка логгера
-        self.logger = logging.getLogger('RPGenerator')
-        self.logger.setLevel(logging.INFO)
-        
-        # Файловый обработчик
-        file_handler = logging.FileHandler(log_file_path, mode='a', encoding='utf-8')
+        # Файловый обработчик (файл открывается при первой записи из буфера)
+        file_handler = logging.FileHandler(log_file_path, mode='a', encoding='utf-8', delay=True)
         file_handler.setLevel(logging.INFO)
         
         # Консольный обработчик
@@ -49,9 +63,17 @@ class RPLogger:
         file_handler.setFormatter(formatter)
         console_handler.setFormatter(formatter)
         
+        # Запись в файл буферизуется: сброс по заполнению буфера, при ошибке
+        # и в log_summary (остаток сбрасывается также при завершении программы)
+        file_buffer = logging.handlers.MemoryHandler(
+            capacity=1000, flushLevel=logging.ERROR, target=file_handler
+        )
+        file_buffer.setLevel(logging.INFO)
+        
         # Добавляем обработчики, если их ещё нет
         if not self.logger.handlers:
-            self.logger.addHandler(file_handler)
+            self._file_buffer = file_buffer
+            self.logger.addHandler(file_buffer)
             self.logger.addHandler(console_handler)
     
     def log_start(self):
@@ -87,25 +109,58 @@ class RPLogger:
             image_path: путь к картинке (если применимо)
         """
         self.stats['total'] += 1
-        if error_code not in self.stats['errors']:
-            self.stats['errors'][error_code] = 0
         self.stats['errors'][error_code] += 1
         
-        msg = f"{error_code} | {article} | {name}"
+        parts = [error_code, article, name]
         if image_path:
-            msg += f" | Картинка: {image_path}"
+            parts.append(f"Картинка: {image_path}")
         if error_msg:
-            msg += f" | {error_msg}"
+            parts.append(error_msg)
+        
+        self.logger.error(' | '.join(parts))
+    
+    def log_warning(self, message: str, *args):
+        """Логирование предупреждения (args подставляются в message через %)"""
+        self.logger.warning(message, *args)
+    
+    def log_info(self, message: str, *args):
+        """Логирование информационного сообщения (args подставляются в message через %)"""
+        self.logger.info(message, *args)
+    
+    def start_queue_listener(self, log_queue) -> logging.handlers.QueueListener:
+        """
+        Запуск приёма записей из рабочих процессов
         
-        self.logger.error(msg)
+        Args:
+            log_queue: очередь, переданная логгерам рабочих процессов
+            
+        Returns:
+            Запущенный QueueListener (остановить через stop())
+        """
+        listener = logging.handlers.QueueListener(
+            log_queue, *self.logger.handlers, respect_handler_level=True
+        )
+        listener.start()
+        return listener
     
-    def log_warning(self, message: str):
-        """Логирование предупреждения"""
-        self.logger.warning(message)
+    def reset_stats(self):
+        """Сброс статистики"""
+        self.stats = {
+            'total': 0,
+            'success': 0,
+            'errors': Counter()
+        }
     
-    def log_info(self, message: str):
-        """Логирование информационного сообщения"""
-        self.logger.info(message)
+    def merge_stats(self, stats: dict):
+        """
+        Добавление статистики, собранной в рабочем процессе
+        
+        Args:
+            stats: словарь статистики того же формата, что и self.stats
+        """
+        self.stats['total'] += stats['total']
+        self.stats['success'] += stats['success']
+        self.stats['errors'].update(stats['errors'])
     
     def log_summary(self):
         """Вывод итоговой статистики"""
@@ -127,5 +182,11 @@ class RPLogger:
         self.logger.info("-" * 80)
         self.logger.info(f"Лог-файл: {self.log_file_path}")
         self.logger.info("=" * 80)
+        self.flush()
         
         return self.stats
+    
+    def flush(self):
+        """Запись накопленных сообщений в файл лога"""
+        if self._file_buffer is not None:
+            self._file_buffer.flush()
@@ -3,35 +3,125 @@
 """
 import os
 import glob
+import fnmatch
 from typing import Dict, List, Optional, Tuple
-import pdfplumber
+import fitz
 import re
 
 
 class PDFParser:
     """Класс для парсинга PDF паспортов"""
     
+    # Версия формата результата extract_technical_data.
+    # Увеличивать при изменении логики парсинга, чтобы сбросить кэш паспортов
+    CACHE_VERSION = 3
+    
+    # Регулярные выражения разбора таблиц и текста паспорта
+    PARENTHESES_RE = re.compile(r'\([^)]+\)')
+    LINE_TAIL_RE = re.compile(r'\n.*')
+    COLUMN_GAP_RE = re.compile(r'[\t\s]{2,}')
+    UNIT_SUFFIX_RE = re.compile(r',\s*(мм|кг|м)\s*')
+    CYRILLIC_WORD_RE = re.compile(r'[а-яА-Я]+')
+    DIMENSION_KEYWORD_RE = re.compile(r'длина|ширина|высота|масса', re.IGNORECASE)
+    # Единица измерения - отдельное слово, а не буквы внутри слова ("Масса", "Объем")
+    UNIT_RE = re.compile(r'(?<![а-яё])(мм|кг|м)(?![а-яё])', re.IGNORECASE)
+    
     def __init__(self, passports_dir: str, pattern: str = "*{ART}*.pdf"):
         """
         Инициализация парсера PDF
         """
         self.passports_dir = passports_dir
         self.pattern = pattern
+        
+        # Содержимое папки паспортов читается один раз и обновляется
+        # только при изменении времени модификации папки
+        self._listing: List[Tuple[str, str]] = []
+        self._listing_mtime: Optional[int] = None
+        # Результаты поиска по артикулу; сбрасываются вместе со списком файлов
+        self._found: Dict[str, Optional[str]] = {}
+        
+        # Части паттерна до и после {ART} компилируются один раз:
+        # поиск по артикулу не требует компиляции шаблона для каждого изделия
+        parts = pattern.split('{ART}')
+        if len(parts) == 2:
+            self._prefix_re = re.compile(fnmatch.translate(os.path.normcase(parts[0])))
+            self._suffix_re = re.compile(fnmatch.translate(os.path.normcase(parts[1])))
+        else:
+            self._prefix_re = self._suffix_re = None
     
     def find_passport(self, article: str) -> Optional[str]:
         """
         Поиск файла паспорта по артикулу
         """
         search_pattern = self.pattern.replace('{ART}', article)
-        search_path = os.path.join(self.passports_dir, search_pattern)
         
-        files = glob.glob(search_path)
+        # Паттерн с подпапками обрабатываем обычным glob
+        if os.path.dirname(search_pattern):
+            files = glob.glob(os.path.join(self.passports_dir, search_pattern))
+            return files[0] if files else None
+        
+        listing = self._list_passports()
+        if article not in self._found:
+            self._found[article] = self._match_passport(article, search_pattern, listing)
+        return self._found[article]
+    
+    def _match_passport(self, article: str, search_pattern: str,
+                        listing: List[Tuple[str, str]]) -> Optional[str]:
+        """
+        Поиск паспорта по артикулу среди файлов папки паспортов
         
-        if files:
-            return files[0]
+        Args:
+            article: артикул изделия
+            search_pattern: паттерн имени файла с подставленным артикулом
+            listing: содержимое папки паспортов (см. _list_passports)
+            
+        Returns:
+            Путь к файлу паспорта или None
+        """
+        if self._prefix_re is None:
+            for filename, _ in listing:
+                if fnmatch.fnmatch(filename, search_pattern):
+                    return os.path.join(self.passports_dir, filename)
+            return None
+        
+        # Имя подходит, если артикул входит в него так, что часть до артикула
+        # соответствует началу паттерна, а часть после - его окончанию
+        needle = os.path.normcase(article)
+        for filename, normalized in listing:
+            start = normalized.find(needle)
+            while start != -1:
+                if (self._prefix_re.match(normalized[:start])
+                        and self._suffix_re.match(normalized[start + len(needle):])):
+                    return os.path.join(self.passports_dir, filename)
+                start = normalized.find(needle, start + 1)
         
         return None
     
+    def _list_passports(self) -> List[Tuple[str, str]]:
+        """
+        Получить имена файлов в папке паспортов (скрытые файлы пропускаются, как в glob)
+        
+        Returns:
+            Список пар (имя файла, имя в нормализованном регистре)
+        """
+        try:
+            mtime = os.stat(self.passports_dir).st_mtime_ns
+            if mtime != self._listing_mtime:
+                with os.scandir(self.passports_dir) as entries:
+                    self._listing = [
+                        (entry.name, os.path.normcase(entry.name))
+                        for entry in entries if not entry.name.startswith('.')
+                    ]
+                self._listing_mtime = mtime
+                self._found.clear()
+        except OSError:
+            # Папка недоступна: при её появлении список и результаты поиска строятся заново
+            self._listing_mtime = None
+            self._found.clear()
+            return []
+        
+        return self._listing
+    
     def extract_technical_data(self, pdf_path: str) -> Dict[str, Tuple[str, str]]:
         """
         Извлечение таблицы "Основные технические данные"
@@ -41,82 +131,106 @@ class PDFParser:
         
         technical_data = {}
         
+        # Текст и таблицы страниц извлекаются через PyMuPDF: движок MuPDF на C
+        # заметно быстрее pdfminer, на котором построен pdfplumber
+        text_doc = None
+        # Таблицы страниц, уже извлечённые из документа
+        page_tables: Dict[int, list] = {}
+        
+        def get_tables(page_idx: int) -> list:
+            if page_idx not in page_tables:
+                page_tables[page_idx] = [
+                    table.extract() for table in text_doc[page_idx].find_tables().tables
+                ]
+            return page_tables[page_idx]
+        
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                # Стратегия 1: Ищем страницу с таблицей технических данных
-                for page_num, page in enumerate(pdf.pages):
-                    tables = page.extract_tables()
-                    
-                    # Ищем таблицу с техническими данными
-                    for table in tables:
-                        if len(table) > 1:
-                            # Проверяем заголовок таблицы
-                            header_row = table[0] if table[0] else []
-                            header_text = ' '.join([str(cell).upper() for cell in header_row if cell])
-                            
-                            # Это таблица с техническими данными?
-                            if 'ПАРАМЕТР' in header_text and 'ЗНАЧЕНИЕ' in header_text:
-                                technical_data = self._parse_technical_table(table)
-                                if technical_data:
-                                    break
-                    
-                    if technical_data:
-                        break
+            text_doc = fitz.open(pdf_path)
+            # Текст страниц извлекается один раз и используется обеими стратегиями
+            page_texts = [page.get_text("text") or "" for page in text_doc]
+            page_count = len(page_texts)
+            # Стратегия 1: Ищем страницу с таблицей технических данных
+            for page_num in range(page_count):
+                # Извлечение таблиц - самая дорогая операция: пропускаем страницы,
+                # в тексте которых нет слов заголовка таблицы
+                page_text = page_texts[page_num].upper()
+                if 'ПАРАМЕТР' not in page_text or 'ЗНАЧЕНИЕ' not in page_text:
+                    continue
                 
-                # Стратегия 2: Если не нашли по таблице, ищем страницу с текстом и парсим
-                if not technical_data:
-                    # Пробуем страницы 3-5 (обычно там технические данные)
-                    for page_idx in [3, 4, 2]:
-                        if page_idx < len(pdf.pages):
-                            page = pdf.pages[page_idx]
-                            text = page.extract_text() or ""
-                            
-                            # Проверяем что это действительно страница с данными
-                            if '2. Основные технические данные' in text or 'Основные технические данные' in text:
-                                # Ищем таблицу на этой странице
-                                tables = page.extract_tables()
-                                for table in tables:
-                                    if len(table) > 2:
-                                        result = self._parse_technical_table(table)
-                                        if result:
-                                            technical_data = result
-                                            break
-                                
-                                # Если таблицу не нашли, парсим из текста
-                                if not technical_data:
-                                    technical_data = self._parse_text_data(text)
-                                
-                                if technical_data:
-                                    break
+                tables = get_tables(page_num)
+                
+                # Ищем таблицу с техническими данными
+                for table in tables:
+                    if len(table) > 1:
+                        # Проверяем заголовок таблицы
+                        header_row = table[0] if table[0] else []
+                        header_text = ' '.join([str(cell).upper() for cell in header_row if cell])
+                        
+                        # Это таблица с техническими данными?
+                        if 'ПАРАМЕТР' in header_text and 'ЗНАЧЕНИЕ' in header_text:
+                            technical_data = self._parse_technical_table(table)
+                            if technical_data:
+                                break
                 
+                if technical_data:
+                    break
+            
+            # Стратегия 2: Если не нашли по таблице, ищем страницу с текстом и парсим
+            if not technical_data:
+                # Пробуем страницы 3-5 (обычно там технические данные)
+                for page_idx in [3, 4, 2]:
+                    if page_idx < page_count:
+                        text = page_texts[page_idx]
+                        
+                        # Проверяем что это действительно страница с данными
+                        if 'Основные технические данные' in text:
+                            # Ищем таблицу на этой странице
+                            tables = get_tables(page_idx)
+                            for table in tables:
+                                if len(table) > 2:
+                                    result = self._parse_technical_table(table)
+                                    if result:
+                                        technical_data = result
+                                        break
+                            
+                            # Если таблицу не нашли, парсим из текста
+                            if not technical_data:
+                                technical_data = self._parse_text_data(text)
+                            
+                            if technical_data:
+                                break
+        
         except Exception as e:
             raise Exception(f"Ошибка при парсинге PDF: {str(e)}")
+        finally:
+            if text_doc is not None:
+                text_doc.close()
         
         # Удаляем параметр "размер зоны приземления"
-        keys_to_remove = []
-        for key in technical_data.keys():
-            key_lower = key.lower()
-            if 'зон' in key_lower and 'приземлен' in key_lower:
-                keys_to_remove.append(key)
-        
-        for key in keys_to_remove:
-            del technical_data[key]
-        
-        return technical_data
+        return {
+            key: value for key, value in technical_data.items()
+            if not self._is_landing_zone_param(key)
+        }
     
     @staticmethod
-    def _parse_technical_table(table: List[List[str]]) -> Dict[str, Tuple[str, str]]:
+    def _is_landing_zone_param(key: str) -> bool:
+        """Проверка, относится ли параметр к зоне приземления"""
+        key_lower = key.lower()
+        return 'зон' in key_lower and 'приземлен' in key_lower
+    
+    @classmethod
+    def _parse_technical_table(cls, table: List[List[str]]) -> Dict[str, Tuple[str, str]]:
         """
         Парсинг таблицы технических данных
         """
         data = {}
         
         # Определяем, есть ли заголовок
-        has_header = False
-        if table[0]:
-            header_text = ' '.join([str(c).upper() for c in table[0] if c])
-            if 'ПАРАМЕТР' in header_text or 'НАИМЕНОВАНИЕ' in header_text:
-                has_header = True
+        # Ячейки проверяются по отдельности: поиск останавливается на первой подходящей
+        has_header = bool(table[0]) and any(
+            'параметр' in cell_lower or 'наименование' in cell_lower
+            for cell_lower in (str(c).lower() for c in table[0] if c)
+        )
         
         # Начинаем со второй строки если есть заголовок
         start_row = 1 if has_header else 0
@@ -136,25 +250,20 @@ class PDFParser:
             if not param_clean or not value_clean:
                 continue
             
-            if 'ПАРАМЕТР' in param_clean.upper() or 'ЗНАЧЕНИЕ' in value_clean.upper():
+            # Нижний регистр названия нужен и для отсева заголовков, и для единиц
+            param_lower = param_clean.lower()
+            if 'параметр' in param_lower or 'значение' in value_clean.lower():
                 continue
             
             # Убираем единицы измерения и скобки из названия параметра
-            param_name = re.sub(r'\([^)]+\)', '', param_clean).strip()
-            param_name = re.sub(r'\n.*', '', param_name).strip()  # Убираем переносы строк
+            param_name = cls.PARENTHESES_RE.sub('', param_clean).strip()
+            param_name = cls.LINE_TAIL_RE.sub('', param_name).strip()  # Убираем переносы строк
             
             # Определяем единицу измерения
-            unit = ''
-            param_lower = param_cell.lower()
-            if 'мм' in param_lower:
-                unit = 'мм'
-            elif 'кг' in param_lower:
-                unit = 'кг'
-            elif 'м' in param_lower and 'мм' not in param_lower:
-                unit = 'м'
+            unit = cls._detect_unit(param_lower)
             
             # Очищаем значение
-            value = value_clean.replace('\n', ' ').strip()
+            value = value_clean.replace('\n', ' ')
             
             # Сохраняем
             if param_name and value and len(param_name) > 2:
@@ -162,8 +271,8 @@ class PDFParser:
         
         return data
     
-    @staticmethod
-    def _parse_text_data(text: str) -> Dict[str, Tuple[str, str]]:
+    @classmethod
+    def _parse_text_data(cls, text: str) -> Dict[str, Tuple[str, str]]:
         """
         Парсинг данных из текста (резервный метод)
         """
@@ -178,34 +287,44 @@ class PDFParser:
                 continue
             
             # Ищем строки с размерами
-            if any(keyword in line.lower() for keyword in ['длина', 'ширина', 'высота', 'масса']):
+            if cls.DIMENSION_KEYWORD_RE.search(line):
                 # Пытаемся извлечь параметр и значение
                 # Формат: "Длина, мм 10 222" или "Длина, мм\n10 222"
-                parts = re.split(r'[\t\s]{2,}', line)
+                parts = cls.COLUMN_GAP_RE.split(line)
                 
                 if len(parts) >= 2:
                     param = parts[0].strip()
                     value = parts[-1].strip()
                     
                     # Определяем единицу
-                    unit = ''
-                    if 'мм' in param.lower():
-                        unit = 'мм'
-                    elif 'кг' in param.lower():
-                        unit = 'кг'
+                    unit = cls._detect_unit(param)
                     
                     # Убираем скобки и единицы из параметра
-                    param = re.sub(r'\([^)]+\)', '', param)
-                    param = re.sub(r',\s*(мм|кг|м)\s*', '', param).strip()
+                    param = cls.PARENTHESES_RE.sub('', param)
+                    param = cls.UNIT_SUFFIX_RE.sub('', param).strip()
                     
                     # Убираем буквы из значения
-                    value = re.sub(r'[а-яА-Я]+', '', value).strip()
+                    value = cls.CYRILLIC_WORD_RE.sub('', value).strip()
                     
                     if param and value:
                         data[param] = (value, unit)
         
         return data
     
+    @classmethod
+    def _detect_unit(cls, text: str) -> str:
+        """
+        Определение единицы измерения по названию параметра
+        
+        Args:
+            text: название параметра (например, "Длина, мм")
+            
+        Returns:
+            'мм', 'кг', 'м' или пустая строка, если единица не указана
+        """
+        match = cls.UNIT_RE.search(text)
+        return match.group(1).lower() if match else ''
+    
     def extract_all_data(self, article: str) -> Optional[Dict[str, Tuple[str, str]]]:
         """
         Полный процесс: найти паспорт и извлечь данные
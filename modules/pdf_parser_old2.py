@@ -4,13 +4,18 @@
 import os
 import glob
 from typing import Dict, List, Optional, Tuple
-import pdfplumber
 import re
 
 
 class PDFParser:
     """Класс для парсинга PDF паспортов"""
     
+    # Регулярные выражения разбора таблиц и текста паспорта
+    PARENTHESES_RE = re.compile(r'\([^)]+\)')
+    COLUMN_GAP_RE = re.compile(r'[:\s]{2,}')
+    CYRILLIC_WORD_RE = re.compile(r'[а-яА-Я]+')
+    DIMENSION_KEYWORD_RE = re.compile(r'длина|ширина|высота|масса', re.IGNORECASE)
+    
     def __init__(self, passports_dir: str, pattern: str = "*{ART}*.pdf"):
         """
         Инициализация парсера PDF
@@ -57,6 +62,9 @@ class PDFParser:
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"PDF файл не найден: {pdf_path}")
         
+        # pdfplumber (pdfminer) импортируется долго, поэтому только при разборе
+        import pdfplumber
+        
         technical_data = {}
         
         try:
@@ -102,7 +110,7 @@ class PDFParser:
         keys_to_remove = []
         for key in technical_data.keys():
             key_lower = key.lower()
-            if ('зон' in key_lower and 'приземлен' in key_lower) or 'зоны приземления' in key_lower:
+            if 'зон' in key_lower and 'приземлен' in key_lower:
                 keys_to_remove.append(key)
         
         for key in keys_to_remove:
@@ -110,8 +118,8 @@ class PDFParser:
         
         return technical_data
     
-    @staticmethod
-    def _parse_technical_table(table: List[List[str]]) -> Dict[str, Tuple[str, str]]:
+    @classmethod
+    def _parse_technical_table(cls, table: List[List[str]]) -> Dict[str, Tuple[str, str]]:
         """
         Парсинг таблицы технических данных
         
@@ -139,18 +147,19 @@ class PDFParser:
             # Извлекаем параметр
             param_name = param_cell.strip()
             # Убираем из названия единицы измерения (они в скобках)
-            param_name = re.sub(r'\([^)]+\)', '', param_name).strip()
+            param_name = cls.PARENTHESES_RE.sub('', param_name).strip()
             
             # Извлекаем значение
             value = value_cell.strip()
             
             # Пытаемся определить единицу измерения
             unit = ''
-            if 'мм' in param_cell.lower():
+            param_lower = param_cell.lower()
+            if 'мм' in param_lower:
                 unit = 'мм'
-            elif 'кг' in param_cell.lower():
+            elif 'кг' in param_lower:
                 unit = 'кг'
-            elif 'м' in param_cell.lower():
+            elif 'м' in param_lower:
                 unit = 'м'
             
             # Сохраняем
@@ -159,8 +168,8 @@ class PDFParser:
         
         return data
     
-    @staticmethod
-    def _parse_text_data(text: str) -> Dict[str, Tuple[str, str]]:
+    @classmethod
+    def _parse_text_data(cls, text: str) -> Dict[str, Tuple[str, str]]:
         """
         Парсинг технических данных из текста (резервный метод)
         
@@ -177,9 +186,9 @@ class PDFParser:
         
         for line in lines:
             # Ищем строки с размерами и параметрами
-            if any(keyword in line.lower() for keyword in ['длина', 'ширина', 'высота', 'масса']):
+            if cls.DIMENSION_KEYWORD_RE.search(line):
                 # Пытаемся извлечь параметр и значение
-                parts = re.split(r'[:\s]{2,}', line)
+                parts = cls.COLUMN_GAP_RE.split(line)
                 if len(parts) >= 2:
                     param = parts[0].strip()
                     value = parts[1].strip()
@@ -194,10 +203,10 @@ class PDFParser:
                         unit = 'м'
                     
                     # Убираем единицу из значения
-                    value = re.sub(r'[а-яА-Я]+', '', value).strip()
+                    value = cls.CYRILLIC_WORD_RE.sub('', value).strip()
                     
                     # Убираем скобки из параметра
-                    param = re.sub(r'\([^)]+\)', '', param).strip()
+                    param = cls.PARENTHESES_RE.sub('', param).strip()
                     
                     if param and value:
                         data[param] = (value, unit)
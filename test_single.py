@@ -2,10 +2,6 @@
 Тестовый скрипт для проверки работы программы на одном изделии
 """
 import os
-import sys
-
-# Добавляем путь к модулям
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'modules'))
 
 from modules.config_manager import ConfigManager
 from modules.logger import RPLogger
@@ -66,11 +62,11 @@ def test_single_product():
         test_product = products[0]
         print("\n" + "-" * 80)
         print("ТЕСТОВОЕ ИЗДЕЛИЕ:")
-        print(f"  Артикул: {test_product['article']}")
-        print(f"  Наименование: {test_product['name']}")
-        print(f"  Категория: {test_product['category']}")
-        print(f"  Количество детей: {test_product['children_count']}")
-        print(f"  Путь к изображению: {test_product['image_path']}")
+        print(f"  Артикул: {test_product.article}")
+        print(f"  Наименование: {test_product.name}")
+        print(f"  Категория: {test_product.category}")
+        print(f"  Количество детей: {test_product.children_count}")
+        print(f"  Путь к изображению: {test_product.image_path}")
         print("-" * 80)
         
     except Exception as e:
@@ -89,13 +85,13 @@ def test_single_product():
     
     # Поиск паспорта
     try:
-        passport_path = pdf_parser.find_passport(test_product['article'])
+        passport_path = pdf_parser.find_passport(test_product.article)
         if passport_path:
             print(f"✓ Паспорт найден: {passport_path}")
         else:
-            print(f"✗ Паспорт НЕ найден для артикула: {test_product['article']}")
+            print(f"✗ Паспорт НЕ найден для артикула: {test_product.article}")
             print(f"  Искали в: {passports_dir}")
-            print(f"  По шаблону: {passport_pattern.replace('{ART}', test_product['article'])}")
+            print(f"  По шаблону: {passport_pattern.replace('{ART}', test_product.article)}")
             return
     except Exception as e:
         print(f"✗ Ошибка поиска паспорта: {e}")
@@ -116,10 +112,10 @@ def test_single_product():
         technical_data = {}
     
     # Проверка изображения
-    if os.path.exists(test_product['image_path']):
-        print(f"\n✓ Изображение найдено: {test_product['image_path']}")
+    if os.path.exists(test_product.image_path):
+        print(f"\n✓ Изображение найдено: {test_product.image_path}")
     else:
-        print(f"\n✗ Изображение НЕ найдено: {test_product['image_path']}")
+        print(f"\n✗ Изображение НЕ найдено: {test_product.image_path}")
     
     # DOCX Generator
     try:
@@ -139,7 +135,8 @@ def test_single_product():
     print("=" * 80)
     
     try:
-        output_path = docx_generator.generate_document(test_product, technical_data)
+        output_path = docx_generator.generate_document(test_product, technical_data).result()
+        docx_generator.update_fields(output_path)
         print(f"\n✓✓✓ УСПЕХ! ✓✓✓")
         print(f"\nДокумент создан: {output_path}")
         print(f"\nОткройте файл в Word для проверки результата.")